@@ -0,0 +1,199 @@
+import math
+import numpy as np
+from numba import njit, prange
+
+"""
+Numba kernels for splitting connection lines at circle boundaries.
+Segments inside any circle are drawn translucent, the rest opaque; the
+kernels only compute the pieces, drawing stays with the callers.
+"""
+
+
+# ---------------------------------------------------------
+# SINGLE LINE
+# ---------------------------------------------------------
+@njit(cache=True, fastmath=True)
+def _seg_circle_roots(p1x, p1y, dx, dy, a, inv_a, cx, cy, r2):
+    """
+    Line parameters where p1 + t*(dx, dy) meets the circle (cx, cy, r2 = r²),
+    as (t1, t2, ok); ok is False when the line misses it. a = dx² + dy² and
+    inv_a = 1/a are per line, so no division is left per circle.
+    """
+    fx = p1x - cx
+    fy = p1y - cy
+    # Half-b form of the quadratic: t = (-h ± sqrt(h² - a*c)) / a
+    h = fx*dx + fy*dy
+    c = fx*fx + fy*fy - r2
+    disc = h*h - a*c
+    if disc < 0.0:
+        return 0.0, 0.0, False
+    root = math.sqrt(disc)
+    return (-h - root) * inv_a, (-h + root) * inv_a, True
+
+
+@njit(cache=True)
+def _emit(p1x, p1y, dx, dy, t0, t1, outside, out_seg, out_outside, n):
+    """Write the piece [t0, t1] of the line at slot n; returns n + 1."""
+    out_seg[n, 0, 0] = p1x + t0*dx
+    out_seg[n, 0, 1] = p1y + t0*dy
+    out_seg[n, 1, 0] = p1x + t1*dx
+    out_seg[n, 1, 1] = p1y + t1*dy
+    out_outside[n] = outside
+    return n + 1
+
+
+@njit(cache=True, fastmath=True)
+def _split_line(p1x, p1y, p2x, p2y, circle_xy, circle_r2, pool, n_pool, r_max,
+                out_seg, out_outside):
+    """
+    Split one segment at every crossing with the circles listed in
+    pool[:n_pool]; circle_r2 holds the squared radii. Writes the pieces, in
+    order along the line, into out_seg / out_outside and returns their count.
+    """
+    dx = p2x - p1x
+    dy = p2y - p1y
+    a = dx*dx + dy*dy
+    if a == 0.0:
+        # Coincident endpoints: nothing to draw, and 1/a would be inf/NaN
+        return 0
+    inv_a = 1.0 / a
+
+    # Only circles whose centre lies in the segment's bounding box grown by
+    # the largest radius can touch it; most circles are rejected here.
+    x0 = min(p1x, p2x) - r_max
+    x1 = max(p1x, p2x) + r_max
+    y0 = min(p1y, p2y) - r_max
+    y1 = max(p1y, p2y) + r_max
+    cand = np.empty(n_pool, dtype=np.int64)
+    nc = 0
+    for q in range(n_pool):
+        k = pool[q]
+        cx = circle_xy[k, 0]
+        cy = circle_xy[k, 1]
+        if x0 <= cx <= x1 and y0 <= cy <= y1:
+            cand[nc] = k
+            nc += 1
+
+    # The outside part of the line as sorted, disjoint t-intervals. Each
+    # circle subtracts its chord [max(0, t1), min(1, t2)] from every interval,
+    # which leaves at most a left and a right remainder; empty ones are
+    # dropped by not advancing the write index.
+    s_cur = np.empty(2*nc + 2)
+    e_cur = np.empty(2*nc + 2)
+    s_new = np.empty(2*nc + 2)
+    e_new = np.empty(2*nc + 2)
+    s_cur[0] = 0.0
+    e_cur[0] = 1.0
+    n_iv = 1
+    for q in range(nc):
+        k = cand[q]
+        t1, t2, ok = _seg_circle_roots(p1x, p1y, dx, dy, a, inv_a,
+                                       circle_xy[k, 0], circle_xy[k, 1], circle_r2[k])
+        lo = max(0.0, t1)
+        hi = min(1.0, t2)
+        if not ok or lo >= hi:
+            continue
+        m = 0
+        for p in range(n_iv):
+            s = s_cur[p]
+            e = e_cur[p]
+            s_new[m] = s
+            e_new[m] = min(e, lo)
+            m += int(e_new[m] > s)
+            s_new[m] = max(s, hi)
+            e_new[m] = e
+            m += int(e > s_new[m])
+        s_cur, s_new = s_new, s_cur
+        e_cur, e_new = e_new, e_cur
+        n_iv = m
+
+    # Surviving intervals are the opaque pieces, the gaps between them the
+    # translucent ones.
+    n_out = 0
+    t = 0.0
+    for p in range(n_iv):
+        if s_cur[p] > t:
+            n_out = _emit(p1x, p1y, dx, dy, t, s_cur[p], False, out_seg, out_outside, n_out)
+        n_out = _emit(p1x, p1y, dx, dy, s_cur[p], e_cur[p], True, out_seg, out_outside, n_out)
+        t = e_cur[p]
+    if t < 1.0:
+        n_out = _emit(p1x, p1y, dx, dy, t, 1.0, False, out_seg, out_outside, n_out)
+
+    return n_out
+
+
+# ---------------------------------------------------------
+# ALL CONNECTIONS
+# ---------------------------------------------------------
+@njit(cache=True)
+def _group_pool(group, circle_xy, r_max, pool):
+    """
+    Collect the circles that can touch any of the (G, 2, 2) lines in `group`
+    into pool; returns how many were found.
+    """
+    x0 = group[:, :, 0].min() - r_max
+    x1 = group[:, :, 0].max() + r_max
+    y0 = group[:, :, 1].min() - r_max
+    y1 = group[:, :, 1].max() + r_max
+    n_pool = 0
+    for k in range(circle_xy.shape[0]):
+        cx = circle_xy[k, 0]
+        cy = circle_xy[k, 1]
+        if x0 <= cx <= x1 and y0 <= cy <= y1:
+            pool[n_pool] = k
+            n_pool += 1
+    return n_pool
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _build_segments(lines, group_size, circle_xy, circle_r,
+                    out_seg, out_outside, out_counts):
+    m = circle_r.shape[0]
+    r_max = circle_r.max()
+    circle_r2 = circle_r * circle_r
+    n_groups = lines.shape[0] // group_size
+    for g in prange(n_groups):
+        # Lines of one group (e.g. one living centre into one cell) cross
+        # roughly the same circles, so the obstruction list is filtered once.
+        g0 = g * group_size
+        g1 = g0 + group_size
+        pool = np.empty(m, dtype=np.int64)
+        n_pool = _group_pool(lines[g0:g1], circle_xy, r_max, pool)
+        for li in range(g0, g1):
+            out_counts[li] = _split_line(
+                lines[li, 0, 0], lines[li, 0, 1], lines[li, 1, 0], lines[li, 1, 1],
+                circle_xy, circle_r2, pool, n_pool, r_max,
+                out_seg[li], out_outside[li])
+
+
+def build_segments(lines, circle_xy, circle_r, group_size=1):
+    """
+    Split every (p1, p2) line of the (L, 2, 2) `lines` array against all
+    circles. Consecutive blocks of `group_size` lines share one circle
+    pre-filter, so pass lines grouped by cell pair. Returns
+    (opaque, inside, opaque_line, inside_line): (K, 2, 2) endpoint arrays
+    plus the source line index of each piece, so the caller can look up its
+    colour. Raises ValueError if the line count is not a multiple of
+    `group_size`.
+    """
+    if group_size < 1 or len(lines) % group_size:
+        raise ValueError(f"{len(lines)} lines do not split into groups of {group_size}")
+    lines = np.ascontiguousarray(lines, dtype=np.float64)
+    circle_xy = np.ascontiguousarray(circle_xy, dtype=np.float64)
+    circle_r = np.ascontiguousarray(circle_r, dtype=np.float64)
+
+    n_lines = lines.shape[0]
+    max_pieces = 2*circle_r.shape[0] + 1
+
+    out_seg = np.empty((n_lines, max_pieces, 2, 2))
+    out_outside = np.empty((n_lines, max_pieces), dtype=np.bool_)
+    # Zeroed so a line the kernel never reaches contributes no pieces
+    out_counts = np.zeros(n_lines, dtype=np.int64)
+    _build_segments(lines, group_size, circle_xy, circle_r,
+                    out_seg, out_outside, out_counts)
+
+    valid = np.arange(max_pieces)[None, :] < out_counts[:, None]
+    line_idx = np.broadcast_to(np.arange(n_lines)[:, None], valid.shape)
+    opaque = valid & out_outside
+    inside = valid & ~out_outside
+    return out_seg[opaque], out_seg[inside], line_idx[opaque], line_idx[inside]
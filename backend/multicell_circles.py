@@ -1,24 +1,11 @@
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.figure import Figure
 import numpy as np
-import random
 import sys
 
-# ---------------------------------------------------------
-# PROGRESS BAR
-# ---------------------------------------------------------
-def progress_bar(iteration, total, prefix='', length=40):
-    """
-    Simple clean terminal progress bar.
-    """
-    percent = iteration / float(total)
-    filled = int(length * percent)
-    bar = '█' * filled + '-' * (length - filled)
-    sys.stdout.write(f'\r{prefix} |{bar}| {percent:5.1%}')
-    sys.stdout.flush()
-    if iteration == total:
-        sys.stdout.write('\n')
-
+from _multicell_kernels import build_segments
 
 # ---------------------------------------------------------
 # CONFIGURATION
@@ -50,33 +37,63 @@ CELL_RADIUS = 0.22
 LIVING_RADIUS = 0.10
 FUNCTION_RADIUS = 0.05
 PLOT_MARGIN = 0.08   # extra whitespace around the layout to avoid clipping
+FIGSIZE = (10, 10)   # inches
+DPI = 150            # raster cost grows ~quadratically; use 300 for print
 
 # Random seed for repeatability; set to None for full randomness
 RANDOM_SEED = None
-np.random.seed(RANDOM_SEED)
-random.seed(RANDOM_SEED)
+rng = np.random.default_rng(RANDOM_SEED)
+
+# Colours in FUNCTIONS order, indexed by function number in the hot paths
+FUNC_COLORS = np.array([FUNC_COLOR_MAP[f] for f in FUNCTIONS])
+
+# Unit offsets of the function ring; every cell uses the same table and only
+# rotates/translates it.
+BASE_RING_ANGLES = np.linspace(0, 2*np.pi, len(FUNCTIONS), endpoint=False)
+RING_UNIT = np.stack([np.cos(BASE_RING_ANGLES), np.sin(BASE_RING_ANGLES)], axis=1)
+
+# Ring radius is the same for every cell.
+# Keep a small gap to the outer border and to the living circle in the middle
+_RING_OUTER = CELL_RADIUS - FUNCTION_RADIUS - 0.01
+_RING_INNER = LIVING_RADIUS + FUNCTION_RADIUS + 0.002
+# Pick a feasible radius that favors hugging the border while leaving breathing room
+RING_RADIUS = min(max(_RING_INNER, _RING_OUTER * 0.95), _RING_OUTER)
+# If still squeezed, fall back to the midpoint between living and border
+if RING_RADIUS <= 0:
+    RING_RADIUS = CELL_RADIUS * 0.5
 
 
 # ---------------------------------------------------------
 # RANDOM POSITION HELPERS
 # ---------------------------------------------------------
-def random_cell_positions(n, min_dist=0.55, max_attempts=6000, relax_factor=0.9):
+def random_cell_positions(n, min_dist=0.55, max_attempts=6000, relax_factor=0.9, batch=256):
     """
     Pick cell centres spaced at least `min_dist` apart.
-    Falls back by relaxing the distance if we struggle to fit all cells
-    in the 0.7 x 0.7 region to avoid an infinite search loop.
+    Candidates are tested `batch` at a time; once `max_attempts` of them
+    have failed for one cell, the distance is relaxed so fitting all cells
+    in the 0.7 x 0.7 region cannot turn into an infinite search loop.
     """
-    centres = []
+    centres = np.empty((n, 2))
+    if n == 0:
+        return centres
+    # The first centre has nothing to keep clear of
+    centres[0] = rng.uniform(0.15, 0.85, size=2)
+    k = 1
     attempts = 0
 
-    while len(centres) < n:
-        p = (random.uniform(0.15, 0.85), random.uniform(0.15, 0.85))
-        if all(np.linalg.norm(np.array(p) - np.array(c)) > min_dist for c in centres):
-            centres.append(p)
+    while k < n:
+        # Test a small batch against every accepted centre at once; the
+        # first one that fits is taken, and it is usually among the first few.
+        candidates = rng.uniform(0.15, 0.85, size=(batch, 2))
+        diff = candidates[:, None, :] - centres[None, :k, :]
+        fits = (np.hypot(diff[..., 0], diff[..., 1]) > min_dist).all(axis=1)
+        if fits.any():
+            centres[k] = candidates[fits.argmax()]
+            k += 1
             attempts = 0
             continue
 
-        attempts += 1
+        attempts += batch
         if attempts >= max_attempts:
             min_dist *= relax_factor
             attempts = 0
@@ -85,125 +102,37 @@ def random_cell_positions(n, min_dist=0.55, max_attempts=6000, relax_factor=0.9)
     return centres
 
 
-def ring_positions_inside_cell(center, cell_radius, n_items, item_radius):
+def ring_positions_inside_cell(center):
     """
-    Place items evenly on a ring inside the cell so circles/text do not overlap.
+    Place one item per function evenly on a ring inside the cell so
+    circles/text do not overlap. Returns an (n, 2) array.
     Slight random rotation keeps layouts from looking identical across cells.
     """
-    # Keep a small gap to the outer border and to the living circle in the middle
-    outer_limit = cell_radius - item_radius - 0.01
-    inner_limit = LIVING_RADIUS + item_radius + 0.002
-
-    # Pick a feasible radius that favors hugging the border while leaving breathing room
-    ring_radius = max(inner_limit, outer_limit * 0.95)
-    ring_radius = min(ring_radius, outer_limit)
-
-    # If still squeezed, fall back to the midpoint between living and border
-    if ring_radius <= 0:
-        ring_radius = cell_radius * 0.5
-
-    start_angle = random.uniform(0, 2*np.pi)
-    angles = start_angle + np.linspace(0, 2*np.pi, n_items, endpoint=False)
-    return [
-        (
-            center[0] + ring_radius * np.cos(a),
-            center[1] + ring_radius * np.sin(a)
-        )
-        for a in angles
-    ]
-
-
-# ---------------------------------------------------------
-# GEOMETRY UTILITY: LINE–CIRCLE INTERSECTION
-# ---------------------------------------------------------
-def segment_circle_intersection(p1, p2, center, radius):
-    """
-    Returns whether a segment intersects a circle and the intersection points.
-    Used to draw partial-opacity lines inside circles.
-    """
-
-    p1 = np.array(p1)
-    p2 = np.array(p2)
-    c = np.array(center)
-
-    d = p2 - p1
-    f = p1 - c
-
-    a = np.dot(d, d)
-    b = 2 * np.dot(f, d)
-    c_val = np.dot(f, f) - radius**2
-
-    disc = b*b - 4*a*c_val
-    if disc < 0:
-        return None
-
-    disc = np.sqrt(disc)
-    t1 = (-b - disc) / (2*a)
-    t2 = (-b + disc) / (2*a)
-
-    pts = []
-    if 0 <= t1 <= 1:
-        pts.append(tuple(p1 + t1*d))
-    if 0 <= t2 <= 1:
-        pts.append(tuple(p1 + t2*d))
-
-    return pts if pts else None
-
-
-# ---------------------------------------------------------
-# DRAWING FUNCTION FOR LINE WITH LOW-OPACITY INSIDE CIRCLES
-# ---------------------------------------------------------
-def draw_smart_line(ax, p1, p2, circle_centers, circle_radii, color):
-    """
-    Segments inside circles → 25% opacity
-    Segments outside → 100%
-    """
-
-    segments = [(p1, p2, True)]
-
-    for center, radius in zip(circle_centers, circle_radii):
-        new_segments = []
-        for (a, b, outside) in segments:
-            inter = segment_circle_intersection(a, b, center, radius)
-            if not inter:
-                new_segments.append((a, b, outside))
-                continue
-
-            inter = sorted(inter)
-            pts = [a] + inter + [b]
-
-            for s, e in zip(pts[:-1], pts[1:]):
-                mid = ((s[0] + e[0]) / 2, (s[1] + e[1]) / 2)
-                inside = np.hypot(mid[0] - center[0], mid[1] - center[1]) < radius
-                new_segments.append((s, e, not inside))
-
-        segments = new_segments
-
-    for (a, b, outside) in segments:
-        ax.plot(
-            [a[0], b[0]], [a[1], b[1]],
-            color=color,
-            linewidth=1.6 if outside else 1.2,
-            alpha=1.00 if outside else 0.25,
-            zorder=10
-        )
+    rot = rng.uniform(0, 2*np.pi)
+    cos_r, sin_r = np.cos(rot), np.sin(rot)
+    R = np.array([[cos_r, -sin_r], [sin_r, cos_r]])
+    return np.asarray(center) + RING_RADIUS * (RING_UNIT @ R.T)
 
 
 # ---------------------------------------------------------
 # PREPARE FIGURE
 # ---------------------------------------------------------
-fig, ax = plt.subplots(figsize=(10, 10))
+# Plain Figure + Agg canvas: headless, no pyplot state. The axes fill the
+# whole figure and PLOT_MARGIN in the limits provides the border, so the
+# save needs no tight-bbox pass over every artist.
+fig = Figure(figsize=FIGSIZE)
+FigureCanvasAgg(fig)
+ax = fig.add_axes([0, 0, 1, 1])
 ax.set_xlim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
 ax.set_ylim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
 ax.set_aspect("equal")
 ax.axis("off")
 
 cell_centres = random_cell_positions(N_CELLS)
-living_centres = cell_centres.copy()
-function_centres = [
-    ring_positions_inside_cell(c, CELL_RADIUS, len(FUNCTIONS), FUNCTION_RADIUS)
+function_centres = np.ascontiguousarray([
+    ring_positions_inside_cell(c)
     for c in cell_centres
-]
+])
 
 all_circle_centres = []
 all_circle_radii = []
@@ -215,76 +144,83 @@ for i, c in enumerate(cell_centres):
         all_circle_centres.append(fc)
         all_circle_radii.append(FUNCTION_RADIUS)
 
+# Convert once to the contiguous float64 layout the kernel reads directly.
+circle_xy = np.ascontiguousarray(all_circle_centres, dtype=np.float64)
+circle_r = np.ascontiguousarray(all_circle_radii, dtype=np.float64)
+
 
 # ---------------------------------------------------------
-# DRAW CONNECTION LINES WITH PROGRESS BAR
+# DRAW CONNECTION LINES
 # ---------------------------------------------------------
-total_connections = N_CELLS * len(FUNCTIONS) * (N_CELLS)   # approx upper bound
-counter = 0
-
-for i, liv in enumerate(living_centres):
-
-    # internal connections
-    for (fx, fy), fname in zip(function_centres[i], FUNCTIONS):
-        color = FUNC_COLOR_MAP[fname]
-        draw_smart_line(ax, liv, (fx, fy),
-                        all_circle_centres, all_circle_radii, color)
-        counter += 1
-        progress_bar(counter, total_connections, prefix="Drawing connections")
-
-    # external connections
-    for j, funcs in enumerate(function_centres):
-        if i == j:
-            continue
-        for (fx, fy), fname in zip(funcs, FUNCTIONS):
-            color = FUNC_COLOR_MAP[fname]
-            draw_smart_line(ax, liv, (fx, fy),
-                            all_circle_centres, all_circle_radii, color)
-            counter += 1
-            progress_bar(counter, total_connections, prefix="Drawing connections")
+# Every living centre connects to every function of every cell (its own
+# included): build all N·N·F endpoint pairs at once, grouped by cell pair.
+n_cells, n_funcs = function_centres.shape[:2]
+src = np.broadcast_to(cell_centres[:, None, None, :], (n_cells, n_cells, n_funcs, 2))
+tgt = np.broadcast_to(function_centres[None, :, :, :], (n_cells, n_cells, n_funcs, 2))
+lines = np.stack([src, tgt], axis=-2).reshape(n_cells * n_cells * n_funcs, 2, 2)
+line_colors = np.tile(FUNC_COLORS, n_cells * n_cells)
+
+# One parallel kernel call splits every line against every circle.
+opaque_segs, inside_segs, opaque_line, inside_line = build_segments(
+    lines, circle_xy, circle_r, group_size=n_funcs)
+print(f"Split connections into {len(opaque_segs) + len(inside_segs)} pieces")
+
+# Every sub-segment goes into one of two batches so the whole network is
+# drawn with two LineCollections instead of thousands of Line2D artists.
+# The dense line layer is rasterized; circles and labels stay vector.
+for segs, idx, lw, alpha in ((opaque_segs, opaque_line, 1.6, 1.0),
+                             (inside_segs, inside_line, 1.2, 0.25)):
+    lc = LineCollection(segs, colors=line_colors[idx],
+                        linewidths=lw, alpha=alpha, zorder=10)
+    lc.set_rasterized(True)
+    ax.add_collection(lc)
 
 
 # ---------------------------------------------------------
 # DRAW CIRCLES AND LABELS (TOP MOST)
 # ---------------------------------------------------------
+living_circles = []
+function_circles = []
+border_circles = []
+
+# Shared label styles; colours vary per function and are passed separately.
+LIVING_TEXT_KW = dict(ha='center', va='center', fontsize=10, color="black", zorder=23)
+FUNCTION_TEXT_KW = dict(ha='center', va='center', fontsize=8, zorder=25)
+
 for ci, c in enumerate(cell_centres):
 
-    ax.add_patch(
-        patches.Circle(c, LIVING_RADIUS,
-                       fill=True, color=LIVING_COLOR,
-                       linewidth=3.0, edgecolor=LIVING_OUTLINE,
-                       zorder=22)
-    )
-    plt.text(c[0], c[1], "living", ha='center', va='center',
-             fontsize=10, color="black", zorder=23)
-
-    for (fx, fy), fname in zip(function_centres[ci], FUNCTIONS):
-        col = FUNC_COLOR_MAP[fname]
-        ax.add_patch(
-            patches.Circle(
-                (fx, fy), FUNCTION_RADIUS,
-                fill=True, color="white",
-                edgecolor=col, linewidth=3.6,
-                zorder=24
-            )
-        )
-        plt.text(fx, fy, fname,
-                 ha='center', va='center',
-                 fontsize=8, color=col,
-                 zorder=25)
-
-    # Draw the cell border last with the highest zorder so the dashed outline
-    # stays on top of circles, labels, and connection lines.
-    ax.add_patch(
-        patches.Circle(c, CELL_RADIUS, fill=False,
-                       linestyle="--", color=CELL_BORDER_COLOR,
-                       linewidth=2.6, zorder=50)
-    )
+    living_circles.append(patches.Circle(c, LIVING_RADIUS))
+    ax.text(c[0], c[1], "living", **LIVING_TEXT_KW)
+
+    for (fx, fy), fname, col in zip(function_centres[ci], FUNCTIONS, FUNC_COLORS):
+        function_circles.append(patches.Circle((fx, fy), FUNCTION_RADIUS))
+        ax.text(fx, fy, fname, color=col, **FUNCTION_TEXT_KW)
+
+    border_circles.append(patches.Circle(c, CELL_RADIUS))
+
+# One collection per circle kind keeps the patch count at three.
+ax.add_collection(
+    PatchCollection(living_circles, match_original=False,
+                    facecolors=LIVING_COLOR, edgecolors=LIVING_OUTLINE,
+                    linewidths=3.0, zorder=22)
+)
+ax.add_collection(
+    PatchCollection(function_circles, match_original=False,
+                    facecolors="white",
+                    edgecolors=np.tile(FUNC_COLORS, N_CELLS),
+                    linewidths=3.6, zorder=24)
+)
+# Draw the cell borders last with the highest zorder so the dashed outline
+# stays on top of circles, labels, and connection lines.
+ax.add_collection(
+    PatchCollection(border_circles, match_original=False,
+                    facecolors="none", edgecolors=CELL_BORDER_COLOR,
+                    linestyles="--", linewidths=2.6, zorder=50)
+)
 
 
 # ---------------------------------------------------------
 # SAVE
 # ---------------------------------------------------------
-plt.savefig("multicell_network_styled.png", dpi=300,
-            bbox_inches="tight", pad_inches=0.2)
+fig.savefig("multicell_network_styled.png", dpi=DPI)
 print("\nSaved multicell_network_styled.png")
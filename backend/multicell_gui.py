@@ -1,10 +1,14 @@
 import sys
-import random
+from contextlib import contextmanager
 import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
 from matplotlib.widgets import Slider, Button, TextBox
 
+from _multicell_kernels import build_segments
+
 """
 Interactive GUI to explore the multicell network:
 - Drag any cell to reposition it; lines and circles update live.
@@ -43,18 +47,30 @@ LIVING_RADIUS = 0.10
 FUNCTION_RADIUS = 0.05
 PLOT_MARGIN = 0.08
 
+# Unit offsets of the function ring; cells only rotate and translate them
+BASE_RING_ANGLES = np.linspace(0, 2*np.pi, len(FUNCTIONS), endpoint=False)
+RING_COS = np.cos(BASE_RING_ANGLES)
+RING_SIN = np.sin(BASE_RING_ANGLES)
+
+# Sampled hsv colormap for the colour randomizer
+_HSV_LUT = plt.cm.hsv(np.linspace(0, 1, 256))[:, :3]
+
 
 # ---------------------------------------------------------
 # POSITION HELPERS
 # ---------------------------------------------------------
-def random_cell_positions(n, min_dist=0.55, max_attempts=6000, relax_factor=0.9):
-    centres = []
+def random_cell_positions(n, rng, min_dist=0.55, max_attempts=6000, relax_factor=0.9):
+    centres = np.empty((n, 2))
+    k = 0
     attempts = 0
 
-    while len(centres) < n:
-        p = (random.uniform(0.15, 0.85), random.uniform(0.15, 0.85))
-        if all(np.linalg.norm(np.array(p) - np.array(c)) > min_dist for c in centres):
-            centres.append(p)
+    while k < n:
+        p = rng.uniform(0.15, 0.85, 2)
+        # Squared distances to every accepted centre in one vector op
+        d2 = ((centres[:k] - p)**2).sum(1)
+        if k == 0 or d2.min() > min_dist*min_dist:
+            centres[k] = p
+            k += 1
             attempts = 0
             continue
 
@@ -67,7 +83,11 @@ def random_cell_positions(n, min_dist=0.55, max_attempts=6000, relax_factor=0.9)
     return centres
 
 
-def ring_positions_inside_cell(center, cell_radius, n_items, item_radius):
+def ring_positions_inside_cell(centres, cell_radius, item_radius, rng):
+    """
+    Ring of one item per function inside every cell, as an (N, F, 2) array.
+    Each cell gets its own random start angle.
+    """
     # Keep a small gap to the outer border and to the living circle in the middle
     outer_limit = cell_radius - item_radius - 0.01
     inner_limit = LIVING_RADIUS + item_radius + 0.002
@@ -77,79 +97,80 @@ def ring_positions_inside_cell(center, cell_radius, n_items, item_radius):
     if ring_radius <= 0:
         ring_radius = cell_radius * 0.5
 
-    start_angle = random.uniform(0, 2*np.pi)
-    angles = start_angle + np.linspace(0, 2*np.pi, n_items, endpoint=False)
-    return [
-        (
-            center[0] + ring_radius * np.cos(a),
-            center[1] + ring_radius * np.sin(a)
-        )
-        for a in angles
-    ]
+    centres = np.asarray(centres, dtype=float)
+    start = rng.uniform(0, 2*np.pi, len(centres))
+    cos_s = np.cos(start)[:, None]
+    sin_s = np.sin(start)[:, None]
+    # cos/sin of (start + base) via the angle-sum identities: only N new trig calls
+    offsets = np.stack([cos_s*RING_COS - sin_s*RING_SIN,
+                        sin_s*RING_COS + cos_s*RING_SIN], axis=-1)
+    return centres[:, None, :] + ring_radius * offsets
 
 
 # ---------------------------------------------------------
-# GEOMETRY AND DRAWING
+# BLITTING
 # ---------------------------------------------------------
-def segment_circle_intersection(p1, p2, center, radius):
-    p1 = np.array(p1)
-    p2 = np.array(p2)
-    c = np.array(center)
-
-    d = p2 - p1
-    f = p1 - c
-
-    a = np.dot(d, d)
-    b = 2 * np.dot(f, d)
-    c_val = np.dot(f, f) - radius**2
-
-    disc = b*b - 4*a*c_val
-    if disc < 0:
-        return None
-
-    disc = np.sqrt(disc)
-    t1 = (-b - disc) / (2*a)
-    t2 = (-b + disc) / (2*a)
-
-    pts = []
-    if 0 <= t1 <= 1:
-        pts.append(tuple(p1 + t1*d))
-    if 0 <= t2 <= 1:
-        pts.append(tuple(p1 + t2*d))
-
-    return pts if pts else None
-
-
-def draw_smart_line(ax, p1, p2, circle_centers, circle_radii, color,
-                    lw_out=1.6, lw_in=1.2, zorder_base=10):
-    segments = [(p1, p2, True)]
-
-    for center, radius in zip(circle_centers, circle_radii):
-        new_segments = []
-        for (a, b, outside) in segments:
-            inter = segment_circle_intersection(a, b, center, radius)
-            if not inter:
-                new_segments.append((a, b, outside))
-                continue
+class BlitManager:
+    """
+    Keeps the axes background cached after a full draw and repaints only the
+    animated artists on interactive updates (matplotlib blitting recipe).
+    """
+
+    def __init__(self, canvas, ax):
+        self.canvas = canvas
+        self.ax = ax
+        self._bg = None
+        self._artists = []
+        self._suspended = False
+        self.cid = canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        # Ignore draws of other canvases (e.g. the temporary SVG one on export)
+        if self._suspended or (event is not None and event.canvas is not self.canvas):
+            return
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_animated()
 
-            inter = sorted(inter)
-            pts = [a] + inter + [b]
+    def add_artist(self, art):
+        art.set_animated(True)
+        self._artists.append(art)
 
-            for s, e in zip(pts[:-1], pts[1:]):
-                mid = ((s[0] + e[0]) / 2, (s[1] + e[1]) / 2)
-                inside = np.hypot(mid[0] - center[0], mid[1] - center[1]) < radius
-                new_segments.append((s, e, not inside))
+    def remove_artists(self, arts):
+        gone = {id(a) for a in arts}
+        self._artists = [a for a in self._artists if id(a) not in gone]
 
-        segments = new_segments
+    def _draw_animated(self):
+        fig = self.canvas.figure
+        for a in sorted(self._artists, key=lambda a: a.get_zorder()):
+            fig.draw_artist(a)
 
-    for (a, b, outside) in segments:
-        ax.plot(
-            [a[0], b[0]], [a[1], b[1]],
-            color=color,
-            linewidth=lw_out if outside else lw_in,
-            alpha=1.00 if outside else 0.25,
-            zorder=zorder_base
-        )
+    def update(self):
+        if self._suspended:
+            # Mid-export: the artists are drawn by savefig, not blitted
+            return
+        if self._bg is None:
+            # No background yet: a full draw grabs it and paints the artists
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self._draw_animated()
+        self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+
+    @contextmanager
+    def static_artists(self):
+        """Draw the managed artists as ordinary ones, e.g. for savefig."""
+        self._suspended = True
+        for a in self._artists:
+            a.set_animated(False)
+        try:
+            yield
+        finally:
+            for a in self._artists:
+                a.set_animated(True)
+            self._suspended = False
+            self._bg = None
+            self.canvas.draw_idle()
 
 
 # ---------------------------------------------------------
@@ -172,83 +193,246 @@ class MultiCellGUI:
         self.outline_width_cell = 2.6
         self.living_outline_color = LIVING_OUTLINE
         self.cell_border_color = CELL_BORDER_COLOR
+        self._refresh_rgba()
+        self._rng = np.random.default_rng()
         self.lines_on_top = False
 
         self.fig = plt.figure(figsize=(10, 10))
         self.fig.patch.set_facecolor("#0b1221")
-        # Main drawing axis
-        self.ax_main = self.fig.add_axes([0.05, 0.15, 0.9, 0.8])
+        # Main drawing axis, left of the control panel (see _init_controls)
+        self.ax_main = self.fig.add_axes([0.04, 0.16, 0.66, 0.80])
         self.ax_main.set_xlim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
         self.ax_main.set_ylim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
         self.ax_main.set_aspect("equal")
         self.ax_main.axis("off")
         self.ax_main.set_facecolor("#0f172a")
+        # The axes state above is set once and never cleared; the limits are
+        # fixed, so adding artists must not feed the data limits either.
+        self.ax_main.set_autoscale_on(False)
 
         self.dragging_idx = None
         self.last_xy = None
 
+        # Circles and labels are created once per layout, the connection
+        # collections once; all are repainted by blitting (see redraw).
+        self.bm = BlitManager(self.fig.canvas, self.ax_main)
+        self._living_patches = []
+        self._living_texts = []
+        self._func_patches = []
+        self._func_texts = []
+        self._border_patches = []
+        # One LineCollection per (function, outside) bucket, kept for the
+        # lifetime of the GUI; layouts only swap their segments.
+        self._line_collections = {}
+        self._line_conns = {}
+        for outside in (True, False):
+            for f in range(len(FUNCTIONS)):
+                lc = LineCollection([], alpha=1.00 if outside else 0.25)
+                self.ax_main.add_collection(lc, autolim=False)
+                self.bm.add_artist(lc)
+                self._line_collections[(f, outside)] = lc
+        # Geometry the line collections were split for; None forces a re-split
+        self._geom_hash = None
+        # Style changes are applied once per frame, see _request_redraw
+        self._redraw_pending = False
+        self._redraw_timer = self.fig.canvas.new_timer(interval=16)
+        self._redraw_timer.single_shot = True
+        self._redraw_timer.add_callback(self._flush_redraw)
+
         self._init_layout()
         self._init_controls()
         self._connect_events()
-        self._layout_controls()
         self.redraw()
 
     # ----- layout state -----
     def _init_layout(self):
         min_dist = self.cell_spacing if self.avoid_overlap else 0.05
-        self.cell_centres = random_cell_positions(self.n_cells, min_dist=min_dist)
-        self.living_centres = self.cell_centres.copy()
-        self.function_centres = [
-            ring_positions_inside_cell(c, CELL_RADIUS, len(FUNCTIONS), FUNCTION_RADIUS)
-            for c in self.cell_centres
-        ]
+        # Geometry is kept as arrays: cell_xy (N, 2) holds the living centres
+        # (which are also the cell centres), func_xy (N, F, 2) their rings.
+        self.cell_xy = random_cell_positions(self.n_cells, self._rng, min_dist=min_dist)
+        self.func_xy = ring_positions_inside_cell(self.cell_xy, CELL_RADIUS, FUNCTION_RADIUS, self._rng)
+        self._geom_hash = None
+        # Circles and labels are reused across layouts with the same number
+        # of cells; redraw() moves them into place.
+        if len(self._living_patches) != self.n_cells:
+            self._build_artists()
+        self._rebuild_lines()
+
+    def _build_artists(self):
+        """Replace the per-cell circles and labels after a cell count change."""
+        old = (self._living_patches + self._living_texts + self._border_patches
+               + [a for row in self._func_patches + self._func_texts for a in row])
+        self.bm.remove_artists(old)
+        for art in old:
+            art.remove()
+
+        self._living_patches = []
+        self._living_texts = []
+        self._func_patches = []
+        self._func_texts = []
+        self._border_patches = []
+        for ci, c in enumerate(self.cell_xy):
+            self._living_patches.append(patches.Circle(c, LIVING_RADIUS, facecolor=LIVING_COLOR, zorder=22))
+            self._living_texts.append(self.ax_main.text(c[0], c[1], "living", ha='center', va='center', zorder=23))
+            # functions of cell ci: _func_patches[ci][f] / _func_texts[ci][f]
+            self._func_patches.append([
+                patches.Circle((fx, fy), FUNCTION_RADIUS, facecolor="white", zorder=24)
+                for fx, fy in self.func_xy[ci]
+            ])
+            self._func_texts.append([
+                self.ax_main.text(fx, fy, fname, ha='center', va='center', zorder=25)
+                for (fx, fy), fname in zip(self.func_xy[ci], FUNCTIONS)
+            ])
+            # cell border drawn last
+            self._border_patches.append(patches.Circle(c, CELL_RADIUS, fill=False, linestyle="--", zorder=50))
+
+        func_patches = [p for row in self._func_patches for p in row]
+        func_texts = [t for row in self._func_texts for t in row]
+        # add_artist rather than add_patch: no data-limit update per circle
+        for patch in self._living_patches + func_patches + self._border_patches:
+            self.ax_main.add_artist(patch)
+        for art in (self._living_patches + self._living_texts + func_patches
+                    + func_texts + self._border_patches):
+            self.bm.add_artist(art)
+
+    def _rebuild_lines(self):
+        """Re-split every connection against the circles of the current layout."""
+        key = (self.cell_xy.tobytes(), self.func_xy.tobytes())
+        if key == self._geom_hash:
+            # Nothing moved since the last split; the collections are current
+            return
+        self._geom_hash = key
+
+        n_funcs = self.func_xy.shape[1]
+        lines, circle_xy, circle_r = self._connection_geometry()
+        self._lines = lines
+        self._pieces = build_segments(lines, circle_xy, circle_r, group_size=n_funcs)
+        self._fill_lines()
+        # One width jitter per connection, shared by all of its pieces
+        self._resample_jitter(len(lines))
+
+    def _update_lines_for_cell(self, ci, delta):
+        """
+        Re-split only the connections that cell ci's latest move by delta can
+        affect: those ending in it and those passing near its old or new
+        position. The others keep their cached pieces.
+        """
+        n_cells, n_funcs = self.func_xy.shape[:2]
+        lines, circle_xy, circle_r = self._connection_geometry()
+
+        # Lines are grouped by (source, target) cell pair; a group is stale if
+        # the moved cell's disc can reach its bounding box.
+        pts = lines.reshape(n_cells * n_cells, 2 * n_funcs, 2)
+        lo = pts.min(axis=1) - CELL_RADIUS
+        hi = pts.max(axis=1) + CELL_RADIUS
+        new_xy = self.cell_xy[ci]
+        old_xy = new_xy - delta
+        stale_groups = (((old_xy >= lo) & (old_xy <= hi)).all(axis=1)
+                        | ((new_xy >= lo) & (new_xy <= hi)).all(axis=1))
+        stale = np.repeat(stale_groups, n_funcs)
+        sel = np.flatnonzero(stale)
+
+        opaque, inside, opaque_line, inside_line = self._pieces
+        new_o, new_i, new_ol, new_il = build_segments(lines[sel], circle_xy, circle_r, group_size=n_funcs)
+        keep_o = ~stale[opaque_line]
+        keep_i = ~stale[inside_line]
+        self._pieces = (np.concatenate([opaque[keep_o], new_o]),
+                        np.concatenate([inside[keep_i], new_i]),
+                        np.concatenate([opaque_line[keep_o], sel[new_ol]]),
+                        np.concatenate([inside_line[keep_i], sel[new_il]]))
+        self._lines = lines
+        self._geom_hash = (self.cell_xy.tobytes(), self.func_xy.tobytes())
+        self._fill_lines()
+
+    def _connection_geometry(self):
+        """
+        (L, 2, 2) connection endpoints plus the circle arrays for the kernel.
+        Every living centre connects to every function of every cell (its own
+        included), grouped by cell pair.
+        """
+        cells = self.cell_xy
+        funcs = self.func_xy
+        n_cells, n_funcs = funcs.shape[:2]
+        # Circle order per cell: living centre first, then its functions
+        circle_xy = np.concatenate([cells[:, None, :], funcs], axis=1).reshape(-1, 2)
+        circle_r = np.tile(np.r_[LIVING_RADIUS, np.full(n_funcs, FUNCTION_RADIUS)], n_cells)
+
+        src = np.broadcast_to(cells[:, None, None, :], (n_cells, n_cells, n_funcs, 2))
+        tgt = np.broadcast_to(funcs[None, :, :, :], (n_cells, n_cells, n_funcs, 2))
+        lines = np.stack([src, tgt], axis=-2).reshape(n_cells * n_cells * n_funcs, 2, 2)
+        return lines, circle_xy, circle_r
+
+    def _fill_lines(self):
+        """Distribute the cached pieces over the bucket collections."""
+        opaque, inside, opaque_line, inside_line = self._pieces
+        n_funcs = self.func_xy.shape[1]
+        for (f, outside), lc in self._line_collections.items():
+            segs, idx = (opaque, opaque_line) if outside else (inside, inside_line)
+            sel = idx % n_funcs == f
+            lc.set_segments(segs[sel])
+            # Connection index of each segment, for the per-connection jitter
+            self._line_conns[(f, outside)] = idx[sel]
+
+    def _resample_jitter(self, n_conns=None):
+        if n_conns is None:
+            n_conns = len(self._line_jitter)
+        self._line_jitter = self._rng.uniform(-1, 1, n_conns) * self.line_width_jitter
 
     # ----- controls -----
     def _init_controls(self):
-        ax_lw = self.fig.add_axes([0.05, 0.06, 0.3, 0.025])
+        # Every control is created at its final place. The rects are figure
+        # fractions, so a resize never needs a relayout.
+        margin = 0.04
+        panel_x0 = 0.72   # side panel, right of the main axes
+        panel_w = 1 - panel_x0 - margin
+        y_row1 = 0.12
+        y_row2 = 0.07
+        y_row3 = 0.03
+
+        ax_lw = self.fig.add_axes([margin, y_row2, 0.30, 0.03])
         self.slider_lw = Slider(ax_lw, "Line width", 0.5, 4.5, valinit=self.line_width_base, valstep=0.1)
         self.slider_lw.on_changed(self._on_linewidth_change)
         self._style_slider(self.slider_lw)
 
-        ax_jitter = self.fig.add_axes([0.05, 0.03, 0.3, 0.025])
+        ax_jitter = self.fig.add_axes([margin, y_row3, 0.30, 0.03])
         self.slider_jitter = Slider(ax_jitter, "Width jitter", 0.0, 1.0, valinit=self.line_width_jitter, valstep=0.05)
         self.slider_jitter.on_changed(self._on_linewidth_change)
         self._style_slider(self.slider_jitter)
 
-        ax_rand_col = self.fig.add_axes([0.40, 0.06, 0.12, 0.04])
+        ax_rand_col = self.fig.add_axes([margin + 0.32, y_row2, 0.14, 0.04])
         self.btn_rand_col = Button(ax_rand_col, "Random colours", color="#111827", hovercolor="#1f2937")
         self.btn_rand_col.on_clicked(self._on_random_colours)
         self._style_button(self.btn_rand_col)
 
-        ax_rand_layout = self.fig.add_axes([0.40, 0.015, 0.12, 0.04])
+        ax_rand_layout = self.fig.add_axes([margin + 0.32, y_row3 - 0.005, 0.14, 0.04])
         self.btn_rand_layout = Button(ax_rand_layout, "Random layout", color="#111827", hovercolor="#1f2937")
         self.btn_rand_layout.on_clicked(self._on_random_layout)
         self._style_button(self.btn_rand_layout)
 
-        ax_png = self.fig.add_axes([0.56, 0.06, 0.10, 0.04])
+        ax_png = self.fig.add_axes([margin + 0.48, y_row2, 0.12, 0.04])
         self.btn_png = Button(ax_png, "Export PNG", color="#111827", hovercolor="#1f2937")
         self.btn_png.on_clicked(lambda evt: self._export("png"))
         self._style_button(self.btn_png)
 
-        ax_svg = self.fig.add_axes([0.56, 0.015, 0.10, 0.04])
+        ax_svg = self.fig.add_axes([margin + 0.48, y_row3 - 0.005, 0.12, 0.04])
         self.btn_svg = Button(ax_svg, "Export SVG", color="#111827", hovercolor="#1f2937")
         self.btn_svg.on_clicked(lambda evt: self._export("svg"))
         self._style_button(self.btn_svg)
 
         # Cell count
-        ax_cells = self.fig.add_axes([0.05, 0.135, 0.12, 0.025])
+        ax_cells = self.fig.add_axes([margin, y_row1, 0.12, 0.03])
         self.slider_cells = Slider(ax_cells, "Cells", 1, 10, valinit=self.n_cells, valstep=1)
         self.slider_cells.on_changed(self._on_cells_change)
         self._style_slider(self.slider_cells)
 
         # Cell spacing / padding
-        ax_spacing = self.fig.add_axes([0.20, 0.135, 0.18, 0.025])
+        ax_spacing = self.fig.add_axes([margin + 0.14, y_row1, 0.18, 0.03])
         self.slider_spacing = Slider(ax_spacing, "Cell spacing", 0.30, 0.90,
                                      valinit=self.cell_spacing, valstep=0.01)
         self.slider_spacing.on_changed(self._on_spacing_change)
         self._style_slider(self.slider_spacing)
 
-        ax_avoid = self.fig.add_axes([0.40, 0.135, 0.12, 0.035])
+        ax_avoid = self.fig.add_axes([margin + 0.34, y_row1, 0.16, 0.035])
         self.btn_avoid_overlap = Button(ax_avoid,
                                         "Avoid overlap: on" if self.avoid_overlap else "Avoid overlap: off",
                                         color="#111827", hovercolor="#1f2937")
@@ -256,161 +440,110 @@ class MultiCellGUI:
         self._style_button(self.btn_avoid_overlap)
 
         # Font sizes
-        ax_font_liv = self.fig.add_axes([0.70, 0.06, 0.10, 0.025])
+        ax_font_liv = self.fig.add_axes([margin + 0.62, y_row2, 0.12, 0.03])
         self.slider_font_liv = Slider(ax_font_liv, "Living font", 6, 20,
                                       valinit=self.font_size_living, valstep=0.5)
         self.slider_font_liv.on_changed(self._on_font_change)
         self._style_slider(self.slider_font_liv)
 
-        ax_font_fun = self.fig.add_axes([0.70, 0.03, 0.10, 0.025])
+        ax_font_fun = self.fig.add_axes([margin + 0.62, y_row3, 0.12, 0.03])
         self.slider_font_fun = Slider(ax_font_fun, "Func font", 6, 20,
                                       valinit=self.font_size_function, valstep=0.5)
         self.slider_font_fun.on_changed(self._on_font_change)
         self._style_slider(self.slider_font_fun)
 
         # Font colours (hex or named)
-        ax_font_col_liv = self.fig.add_axes([0.82, 0.06, 0.13, 0.03])
+        ax_font_col_liv = self.fig.add_axes([margin + 0.76, y_row2, 0.14, 0.03])
         self.box_font_col_liv = TextBox(ax_font_col_liv, "Living text", initial=self.font_color_living)
         self.box_font_col_liv.on_submit(lambda txt: self._update_font_color(txt, target="living"))
         self._style_textbox(self.box_font_col_liv)
 
-        ax_font_col_fun = self.fig.add_axes([0.82, 0.025, 0.13, 0.03])
+        ax_font_col_fun = self.fig.add_axes([margin + 0.76, y_row3, 0.14, 0.03])
         self.box_font_col_fun = TextBox(ax_font_col_fun, "Func text", initial=self.font_color_function)
         self.box_font_col_fun.on_submit(lambda txt: self._update_font_color(txt, target="function"))
         self._style_textbox(self.box_font_col_fun)
 
         # Outline widths
-        ax_out_liv = self.fig.add_axes([0.05, 0.11, 0.18, 0.025])
+        ax_out_liv = self.fig.add_axes([margin + 0.52, y_row1, 0.14, 0.03])
         self.slider_out_liv = Slider(ax_out_liv, "Living outline", 1.0, 6.0,
                                      valinit=self.outline_width_living, valstep=0.1)
         self.slider_out_liv.on_changed(self._on_outline_width_change)
         self._style_slider(self.slider_out_liv)
 
-        ax_out_fun = self.fig.add_axes([0.25, 0.11, 0.18, 0.025])
+        ax_out_fun = self.fig.add_axes([margin + 0.68, y_row1, 0.14, 0.03])
         self.slider_out_fun = Slider(ax_out_fun, "Func outline", 1.0, 6.0,
                                      valinit=self.outline_width_function, valstep=0.1)
         self.slider_out_fun.on_changed(self._on_outline_width_change)
         self._style_slider(self.slider_out_fun)
 
-        ax_out_cell = self.fig.add_axes([0.45, 0.11, 0.18, 0.025])
+        ax_out_cell = self.fig.add_axes([margin + 0.84, y_row1, 0.14, 0.03])
         self.slider_out_cell = Slider(ax_out_cell, "Cell outline", 1.0, 6.0,
                                       valinit=self.outline_width_cell, valstep=0.1)
         self.slider_out_cell.on_changed(self._on_outline_width_change)
         self._style_slider(self.slider_out_cell)
 
         # Colour overrides for living and cell borders
-        ax_col_liv = self.fig.add_axes([0.65, 0.11, 0.13, 0.03])
+        ax_col_liv = self.fig.add_axes([panel_x0, y_row2, panel_w * 0.75, 0.03])
         self.box_col_liv = TextBox(ax_col_liv, "Living outline", initial=self.living_outline_color)
         self.box_col_liv.on_submit(lambda txt: self._update_simple_color(txt, target="living_outline"))
         self._style_textbox(self.box_col_liv)
 
-        ax_col_cell = self.fig.add_axes([0.82, 0.11, 0.13, 0.03])
+        ax_col_cell = self.fig.add_axes([panel_x0, y_row3, panel_w * 0.75, 0.03])
         self.box_col_cell = TextBox(ax_col_cell, "Cell outline", initial=self.cell_border_color)
         self.box_col_cell.on_submit(lambda txt: self._update_simple_color(txt, target="cell_border"))
         self._style_textbox(self.box_col_cell)
 
         # Toggle connection layer order
-        ax_toggle_lines = self.fig.add_axes([0.56, 0.11, 0.07, 0.04])
+        ax_toggle_lines = self.fig.add_axes([panel_x0, y_row1, panel_w * 0.75, 0.04])
         self.btn_toggle_lines = Button(ax_toggle_lines, "Lines behind", color="#111827", hovercolor="#1f2937")
         self.btn_toggle_lines.on_clicked(self._on_toggle_lines_layer)
         self._style_button(self.btn_toggle_lines)
 
         # Function-specific outline colours
-        self._init_function_color_boxes()
+        self._init_function_color_boxes(panel_x0, panel_w)
 
     def _connect_events(self):
         self.cid_press = self.fig.canvas.mpl_connect("button_press_event", self._on_press)
         self.cid_release = self.fig.canvas.mpl_connect("button_release_event", self._on_release)
         self.cid_motion = self.fig.canvas.mpl_connect("motion_notify_event", self._on_motion)
-        self.cid_resize = self.fig.canvas.mpl_connect("resize_event", self._on_resize)
 
-    def _init_function_color_boxes(self):
+    def _init_function_color_boxes(self, x, panel_w):
         self.func_color_boxes = {}
+        y = 0.82
         for name in FUNCTIONS:
-            ax_box = self.fig.add_axes([0, 0, 0.1, 0.03])  # placeholder, positioned in _layout_controls
+            ax_box = self.fig.add_axes([x, y, panel_w * 0.9, 0.03])
+            y -= 0.032
             box = TextBox(ax_box, f"{name}", initial=self.func_color_map[name])
             box.on_submit(lambda txt, fname=name: self._update_function_color(fname, txt))
             self.func_color_boxes[name] = box
             self._style_textbox(box)
 
-    def _layout_controls(self):
-        margin = 0.04
-        panel_w = 0.24
-        gap = 0.02
-
-        main_width = max(0.38, 1 - panel_w - gap - 2*margin)
-        main_x0 = margin
-        main_y0 = 0.16
-        main_h = 0.80
-        panel_x0 = main_x0 + main_width + gap
-        panel_w_actual = 1 - panel_x0 - margin
-
-        self.ax_main.set_position([main_x0, main_y0, main_width, main_h])
-
-        y_row1 = 0.12
-        y_row2 = 0.07
-        y_row3 = 0.03
-
-        self.slider_cells.ax.set_position([margin, y_row1, 0.12, 0.03])
-        self.slider_spacing.ax.set_position([margin + 0.14, y_row1, 0.18, 0.03])
-        self.btn_avoid_overlap.ax.set_position([margin + 0.34, y_row1, 0.16, 0.035])
-        self.slider_out_liv.ax.set_position([margin + 0.52, y_row1, 0.14, 0.03])
-        self.slider_out_fun.ax.set_position([margin + 0.68, y_row1, 0.14, 0.03])
-        self.slider_out_cell.ax.set_position([margin + 0.84, y_row1, 0.14, 0.03])
-        self.btn_toggle_lines.ax.set_position([panel_x0, y_row1, panel_w_actual * 0.75, 0.04])
-
-        self.slider_lw.ax.set_position([margin, y_row2, 0.30, 0.03])
-        self.slider_jitter.ax.set_position([margin, y_row3, 0.30, 0.03])
-        self.btn_rand_col.ax.set_position([margin + 0.32, y_row2, 0.14, 0.04])
-        self.btn_rand_layout.ax.set_position([margin + 0.32, y_row3 - 0.005, 0.14, 0.04])
-        self.btn_png.ax.set_position([margin + 0.48, y_row2, 0.12, 0.04])
-        self.btn_svg.ax.set_position([margin + 0.48, y_row3 - 0.005, 0.12, 0.04])
-
-        self.slider_font_liv.ax.set_position([margin + 0.62, y_row2, 0.12, 0.03])
-        self.slider_font_fun.ax.set_position([margin + 0.62, y_row3, 0.12, 0.03])
-        self.box_font_col_liv.ax.set_position([margin + 0.76, y_row2, 0.14, 0.03])
-        self.box_font_col_fun.ax.set_position([margin + 0.76, y_row3, 0.14, 0.03])
-
-        self.box_col_liv.ax.set_position([panel_x0, y_row2, panel_w_actual * 0.75, 0.03])
-        self.box_col_cell.ax.set_position([panel_x0, y_row3, panel_w_actual * 0.75, 0.03])
-
-        y = 0.82
-        step = 0.032
-        width = panel_w_actual * 0.9
-        x_box = panel_x0
-        for name, box in self.func_color_boxes.items():
-            box.ax.set_position([x_box, y, width, 0.03])
-            y -= step
-
     # ----- event handlers -----
     def _on_linewidth_change(self, _):
         self.line_width_base = self.slider_lw.val
         self.line_width_jitter = self.slider_jitter.val
-        self.redraw()
+        self._resample_jitter()
+        self._request_redraw()
 
     def _on_outline_width_change(self, _):
         self.outline_width_living = self.slider_out_liv.val
         self.outline_width_function = self.slider_out_fun.val
         self.outline_width_cell = self.slider_out_cell.val
-        self.redraw()
+        self._request_redraw()
 
     def _on_font_change(self, _):
         self.font_size_living = self.slider_font_liv.val
         self.font_size_function = self.slider_font_fun.val
-        self.redraw()
+        self._request_redraw()
 
     def _on_random_colours(self, _event):
-        # random bright colours using HSV with high saturation/value
-        new_map = {}
-        for name in FUNCTIONS:
-            h = random.random()
-            s = 0.8 + 0.2 * random.random()
-            v = 0.85 + 0.15 * random.random()
-            col = tuple(int(c*255) for c in plt.cm.hsv(h)[:3])
-            # convert to hex
-            new_map[name] = '#%02x%02x%02x' % col
-        self.func_color_map = new_map
-        self.redraw()
+        # random bright colours: one random hue per function from the hsv map
+        hues = self._rng.random(len(FUNCTIONS))
+        rgbs = (_HSV_LUT[(hues * 255).astype(int)] * 255).astype(np.uint8)
+        hexes = ['#%02x%02x%02x' % tuple(row) for row in rgbs]
+        self.func_color_map = dict(zip(FUNCTIONS, hexes))
+        self._refresh_rgba()
+        self._request_redraw()
 
     def _on_random_layout(self, _event):
         self._init_layout()
@@ -419,7 +552,7 @@ class MultiCellGUI:
     def _on_toggle_lines_layer(self, _event):
         self.lines_on_top = not self.lines_on_top
         self.btn_toggle_lines.label.set_text("Lines on top" if self.lines_on_top else "Lines behind")
-        self.redraw()
+        self._request_redraw()
 
     def _on_cells_change(self, _):
         self.n_cells = int(self.slider_cells.val)
@@ -437,38 +570,50 @@ class MultiCellGUI:
         self._init_layout()
         self.redraw()
 
-    def _on_resize(self, _event):
-        self._layout_controls()
-        self.fig.canvas.draw_idle()
-
     def _export(self, fmt):
         fname = f"multicell_gui_export.{fmt}"
-        self.fig.savefig(fname, dpi=300 if fmt == "png" else None,
-                         bbox_inches="tight", pad_inches=0.2)
+        # Apply any pending style change now instead of from the timer
+        self._redraw_pending = False
+        self._restyle_artists()
+        # Animated artists are skipped by a normal draw, so hand them back for the save
+        with self.bm.static_artists():
+            self.fig.savefig(fname, dpi=300 if fmt == "png" else None,
+                             bbox_inches="tight", pad_inches=0.2)
         print(f"Saved {fname}")
 
     def _update_function_color(self, fname, text):
         cleaned = self._clean_color(text, self.func_color_map.get(fname, "#000000"))
         self.func_color_map[fname] = cleaned
-        self.redraw()
+        self._refresh_rgba()
+        self._request_redraw()
 
     def _update_font_color(self, text, target):
         if target == "living":
             self.font_color_living = self._clean_color(text, self.font_color_living, allow_auto=False)
         else:
             self.font_color_function = self._clean_color(text, self.font_color_function, allow_auto=True)
-        self.redraw()
+        self._request_redraw()
 
     def _update_simple_color(self, text, target):
         if target == "living_outline":
             new_col = self._clean_color(text, self.living_outline_color)
             self.box_col_liv.set_val(new_col)
             self.living_outline_color = new_col
-            self.redraw()
+            self._refresh_rgba()
+            self._request_redraw()
         elif target == "cell_border":
             new_col = self._clean_color(text, self.cell_border_color)
             self.cell_border_color = new_col
-            self.redraw()
+            self._refresh_rgba()
+            self._request_redraw()
+
+    def _refresh_rgba(self):
+        """Resolve colour strings once so restyling hands RGBA to matplotlib."""
+        # (F, 4) RGBA aligned with FUNCTIONS, so artists index it by function number
+        self._func_colors_rgba = np.array([mcolors.to_rgba(self.func_color_map.get(name, "#000000"))
+                                           for name in FUNCTIONS])
+        self.living_outline_rgba = mcolors.to_rgba(self.living_outline_color)
+        self.cell_border_rgba = mcolors.to_rgba(self.cell_border_color)
 
     @staticmethod
     def _clean_color(text, fallback, allow_auto=False):
@@ -478,126 +623,116 @@ class MultiCellGUI:
         if not text:
             return fallback
         # basic validation: allow named or hex like #rrggbb
-        if text.startswith("#"):
-            if len(text) in (4, 7):
-                return text
+        if text.startswith("#") and len(text) not in (4, 7):
             return fallback
-        return text
+        return text if mcolors.is_color_like(text) else fallback
 
     def _on_press(self, event):
         if event.inaxes != self.ax_main or event.xdata is None or event.ydata is None:
             return
         click = np.array([event.xdata, event.ydata])
-        for idx, centre in enumerate(self.living_centres):
-            if np.linalg.norm(click - np.array(centre)) <= LIVING_RADIUS * 1.4:
-                self.dragging_idx = idx
-                self.last_xy = click
-                break
+        d2 = ((self.cell_xy - click)**2).sum(1)
+        idx = int(d2.argmin())
+        if d2[idx] <= (LIVING_RADIUS * 1.4)**2:
+            self.dragging_idx = idx
+            self.last_xy = (event.xdata, event.ydata)
 
     def _on_motion(self, event):
         if self.dragging_idx is None or event.inaxes != self.ax_main:
             return
         if event.xdata is None or event.ydata is None:
             return
-        new_xy = np.array([event.xdata, event.ydata])
-        delta = new_xy - self.last_xy
-        self.last_xy = new_xy
+        # Plain floats for the pointer; the geometry is moved in place
+        x, y = event.xdata, event.ydata
+        delta = (x - self.last_xy[0], y - self.last_xy[1])
+        self.last_xy = (x, y)
 
         ci = self.dragging_idx
-        self.living_centres[ci] = tuple(np.array(self.living_centres[ci]) + delta)
-        self.cell_centres[ci] = self.living_centres[ci]
-        self.function_centres[ci] = [
-            tuple(np.array(p) + delta) for p in self.function_centres[ci]
-        ]
-        # Skip drawing connection lines during drag for speed; draw them on release.
-        self.redraw(skip_lines=True)
+        self.cell_xy[ci] += delta
+        self.func_xy[ci] += delta
+        # Only the connections near the moved cell are re-split, which is
+        # cheap enough to keep the lines visible while dragging.
+        self._update_lines_for_cell(ci, delta)
+        # Only the dragged cell's circles and labels move
+        self._move_artists([ci])
+        self._restyle_lines()
+        self.bm.update()
 
     def _on_release(self, _event):
+        if self.dragging_idx is None:
+            return
         self.dragging_idx = None
         self.last_xy = None
+        self._rebuild_lines()
         self.redraw()
 
     # ----- drawing -----
-    def redraw(self, skip_lines=False):
-        self.ax_main.clear()
-        self.ax_main.set_xlim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
-        self.ax_main.set_ylim(0 - PLOT_MARGIN, 1 + PLOT_MARGIN)
-        self.ax_main.set_aspect("equal")
-        self.ax_main.axis("off")
-        self.ax_main.set_facecolor("#0f172a")
-
-        if not skip_lines:
-            # Precompute circle masks for smart lines
-            all_circle_centres = []
-            all_circle_radii = []
-            for i, c in enumerate(self.cell_centres):
-                all_circle_centres.append(c)
-                all_circle_radii.append(LIVING_RADIUS)
-                for fc in self.function_centres[i]:
-                    all_circle_centres.append(fc)
-                    all_circle_radii.append(FUNCTION_RADIUS)
-
-            # Draw connections
-            z_lines = 40 if self.lines_on_top else 10
-            for i, liv in enumerate(self.living_centres):
-                # internal
-                for (fx, fy), fname in zip(self.function_centres[i], FUNCTIONS):
-                    color = self.func_color_map.get(fname, "#000000")
-                    self._draw_line_with_jitter(liv, (fx, fy), color, all_circle_centres, all_circle_radii,
-                                                zorder_lines=z_lines)
-                # external
-                for j, funcs in enumerate(self.function_centres):
-                    if i == j:
-                        continue
-                    for (fx, fy), fname in zip(funcs, FUNCTIONS):
-                        color = self.func_color_map.get(fname, "#000000")
-                        self._draw_line_with_jitter(liv, (fx, fy), color, all_circle_centres, all_circle_radii,
-                                                    zorder_lines=z_lines)
-
-        # Draw circles and labels
-        for ci, c in enumerate(self.cell_centres):
-            # living
-            self.ax_main.add_patch(
-                patches.Circle(c, LIVING_RADIUS,
-                               fill=True, color=LIVING_COLOR,
-                               linewidth=self.outline_width_living, edgecolor=self.living_outline_color,
-                               zorder=22)
-            )
-            self.ax_main.text(c[0], c[1], "living", ha='center', va='center',
-                              fontsize=self.font_size_living, color=self.font_color_living, zorder=23)
-
-            # functions
-            for (fx, fy), fname in zip(self.function_centres[ci], FUNCTIONS):
-                col = self.func_color_map.get(fname, "#000000")
-                self.ax_main.add_patch(
-                    patches.Circle(
-                        (fx, fy), FUNCTION_RADIUS,
-                        fill=True, color="white",
-                        edgecolor=col, linewidth=self.outline_width_function,
-                        zorder=24
-                    )
-                )
-                self.ax_main.text(fx, fy, fname,
-                                  ha='center', va='center',
-                                  fontsize=self.font_size_function,
-                                  color=(col if self.font_color_function == "auto" else self.font_color_function),
-                                  zorder=25)
+    def redraw(self):
+        """Push the current style/geometry onto the existing artists and blit."""
+        self._move_artists()
+        self._restyle_artists()
+        self.bm.update()
+
+    def _request_redraw(self):
+        """
+        Coalesce style changes: slider drags fire many events per frame, but
+        the artists are restyled once, when the single-shot timer fires.
+        The restyle runs from the event loop, never from inside a draw.
+        """
+        if self._redraw_pending:
+            return
+        self._redraw_pending = True
+        self._redraw_timer.start()
 
-            # cell border drawn last
-            self.ax_main.add_patch(
-                patches.Circle(c, CELL_RADIUS, fill=False,
-                               linestyle="--", color=self.cell_border_color,
-                               linewidth=self.outline_width_cell, zorder=50)
-            )
-
-        self.fig.canvas.draw_idle()
-
-    def _draw_line_with_jitter(self, p1, p2, color, circle_centres, circle_radii, zorder_lines=10):
-        jitter = (random.random() - 0.5) * 2 * self.line_width_jitter
-        lw_out = max(0.2, self.line_width_base * (1 + jitter))
-        lw_in = max(0.15, lw_out * 0.75)
-        draw_smart_line(self.ax_main, p1, p2, circle_centres, circle_radii,
-                        color=color, lw_out=lw_out, lw_in=lw_in, zorder_base=zorder_lines)
+    def _flush_redraw(self):
+        if not self._redraw_pending:
+            return
+        self._redraw_pending = False
+        self._restyle_artists()
+        self.bm.update()
+
+    def _move_artists(self, cells=None):
+        """Move the circles and labels of `cells` (default: all) to the geometry."""
+        for ci in range(len(self.cell_xy)) if cells is None else cells:
+            c = tuple(self.cell_xy[ci])
+            self._living_patches[ci].set_center(c)
+            self._living_texts[ci].set_position(c)
+            self._border_patches[ci].set_center(c)
+            for circ, txt, (fx, fy) in zip(self._func_patches[ci], self._func_texts[ci], self.func_xy[ci]):
+                circ.set_center((fx, fy))
+                txt.set_position((fx, fy))
+
+    def _restyle_artists(self):
+        """Apply widths, colours and fonts only; geometry is left alone."""
+        for ci in range(len(self.cell_xy)):
+            living = self._living_patches[ci]
+            living.set_linewidth(self.outline_width_living)
+            living.set_edgecolor(self.living_outline_rgba)
+            txt = self._living_texts[ci]
+            txt.set_fontsize(self.font_size_living)
+            txt.set_color(self.font_color_living)
+
+            border = self._border_patches[ci]
+            border.set_linewidth(self.outline_width_cell)
+            border.set_edgecolor(self.cell_border_rgba)
+
+            for circ, txt, col in zip(self._func_patches[ci], self._func_texts[ci], self._func_colors_rgba):
+                circ.set_linewidth(self.outline_width_function)
+                circ.set_edgecolor(col)
+                txt.set_fontsize(self.font_size_function)
+                txt.set_color(col if self.font_color_function == "auto" else self.font_color_function)
+        self._restyle_lines()
+
+    def _restyle_lines(self):
+        z_lines = 40 if self.lines_on_top else 10
+        # Widths per connection, computed once and gathered per bucket
+        lw_out = np.maximum(0.2, self.line_width_base * (1 + self._line_jitter))
+        lw_in = np.maximum(0.15, lw_out * 0.75)
+        for (f, outside), lc in self._line_collections.items():
+            conns = self._line_conns[(f, outside)]
+            lc.set_linewidths((lw_out if outside else lw_in)[conns])
+            lc.set_colors(self._func_colors_rgba[f:f+1])
+            lc.set_zorder(z_lines)
 
     # ---- style helpers to keep the UI cohesive ----
     def _style_button(self, btn):